@@ -0,0 +1,27 @@
+"""
+Books Dashboard - optional Numba kernel for the KPI calculations
+Kept out of main.py because Streamlit re-executes the app script on every rerun,
+while an imported module (and its compiled kernel) lives for the whole server process.
+"""
+
+import numpy as np
+from numba import njit
+
+@njit(cache=True)
+def kpi_kernel(price, in_stock):
+    """Price sum, count, min and max plus the in-stock count in a single pass"""
+    total = 0.0
+    count = 0
+    low = np.inf
+    high = -np.inf
+    stock = 0
+    for i in range(price.shape[0]):
+        p = price[i]
+        if not np.isnan(p):
+            total += p
+            count += 1
+            low = min(low, p)
+            high = max(high, p)
+        if in_stock[i]:
+            stock += 1
+    return total, count, low, high, stock
@@ -1,14 +1,34 @@
-import requests
+import asyncio
+import aiohttp
+import os
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 import pandas as pd
 import re
 from urllib.parse import urljoin
-import time
 
 base_url = "https://books.toscrape.com/catalogue/page-{}.html"
 main_site = "https://books.toscrape.com/"
 
-books = []
+# Maximum number of requests in flight at once (also keeps the load on the server polite)
+MAX_CONCURRENCY = 16
+
+# Transient failures are retried with exponential backoff (0.3s, 0.6s, 1.2s)
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Scraped values are collected column by column and turned into a DataFrame once at the end
+titles, prices, ratings, avails, categories, descriptions = [], [], [], [], [], []
+
+# Catalogue-page selectors, compiled once and evaluated by libxml2 for every book entry
+xp_books = etree.XPath('//article[contains(concat(" ", normalize-space(@class), " "), " product_pod ")]')
+xp_title = etree.XPath('.//h3/a/@title')
+xp_link = etree.XPath('.//h3/a/@href')
+xp_price = etree.XPath('.//p[contains(@class, "price_color")]/text()')
+xp_rating = etree.XPath('.//p[contains(@class, "star-rating")]/@class')
+xp_avail = etree.XPath('.//p[contains(@class, "availability")]/text()')
 
 # Convert rating words to numbers
 rating_map = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
@@ -28,66 +48,139 @@ def clean_price(price_str):
         print(f"⚠️ Warning: Could not convert price '{price_str}' to float. Setting to 0.0")
         return 0.0
 
-for page in range(1, 51):  # There are 50 pages total
-    try:
-        url = base_url.format(page)
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        book_elements = soup.select(".product_pod")
+async def fetch(session, sem, url):
+    """
+    Fetch a page and return its raw HTML bytes, holding a semaphore slot while the request is in flight.
+    Connection errors, timeouts and retryable status codes are retried up to MAX_RETRIES times.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with sem:
+                async with session.get(url) as response:
+                    if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                        response.raise_for_status()
+                        return await response.read()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == MAX_RETRIES:
+                raise
+        # Back off outside the semaphore so other requests can use the slot meanwhile
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+async def fetch_all(session, sem, urls):
+    """
+    Fetch every URL concurrently; a failed request yields its exception in place of the HTML
+    """
+    return await asyncio.gather(*(fetch(session, sem, url) for url in urls), return_exceptions=True)
+
+def parse_list_page(page, html):
+    """
+    Parse a catalogue page into (title, price, rating, availability, detail_link) rows
+    """
+    if isinstance(html, Exception):
+        raise html
+    
+    tree = lxml_html.fromstring(html)
+    book_elements = xp_books(tree)
+    
+    print(f"Scraping page {page} ... ({len(book_elements)} books found)")
+    
+    rows = []
+    for book in book_elements:
+        try:
+            # Extract basic info
+            title = xp_title(book)[0]
+            price_raw = "".join(xp_price(book)).strip()
+            price = clean_price(price_raw)
+            
+            rating_word = xp_rating(book)[0].split()[1]
+            rating = rating_map.get(rating_word, None)
+            
+            availability = "".join(xp_avail(book)).strip()
+            
+            # Get the link to the book detail page
+            detail_link = urljoin(main_site + "catalogue/", xp_link(book)[0])
+            
+            rows.append((title, price, rating, availability, detail_link))
+            
+        except Exception as e:
+            print(f"⚠️ Error processing book on page {page}: {str(e)}")
+            continue
+    
+    return rows
+
+def parse_detail_page(html):
+    """
+    Parse a book detail page into its (category, description)
+    """
+    if isinstance(html, Exception):
+        raise html
+    
+    detail_soup = BeautifulSoup(html, 'lxml')
+    
+    # Extract category
+    breadcrumb = detail_soup.select("ul.breadcrumb li a")
+    category = breadcrumb[2].text if len(breadcrumb) > 2 else "Unknown"
+    
+    # Extract product description (if available)
+    desc = detail_soup.select_one("#product_description")
+    description = desc.find_next("p").text.strip() if desc else "No description available"
+    
+    return category, description
+
+async def main():
+    # A single pooled session is shared by every request; the semaphore caps in-flight requests
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    # Connections are kept alive and reused across requests, so TLS handshakes are amortized
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENCY, limit_per_host=MAX_CONCURRENCY, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=10)
+    headers = {"Accept-Encoding": "gzip, deflate"}
+    pages = range(1, 51)  # There are 50 pages total
+    
+    # Parsing is CPU-bound, so it runs on a thread pool between the two fetch waves
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+            # Fetch and parse all catalogue pages
+            list_pages = await fetch_all(session, sem, [base_url.format(page) for page in pages])
+            list_futures = [executor.submit(parse_list_page, page, html) for page, html in zip(pages, list_pages)]
+            
+            book_rows = []
+            for page, future in zip(pages, list_futures):
+                try:
+                    book_rows.extend((page, row) for row in future.result())
+                except Exception as e:
+                    print(f"❌ Error scraping page {page}: {str(e)}")
+            
+            # Fetch all book detail pages in one wave
+            detail_pages = await fetch_all(session, sem, [row[4] for _, row in book_rows])
         
-        print(f"Scraping page {page} ... ({len(book_elements)} books found)")
+        detail_futures = [executor.submit(parse_detail_page, html) for html in detail_pages]
         
-        for book in book_elements:
+        for (page, row), future in zip(book_rows, detail_futures):
             try:
-                # Extract basic info
-                title = book.h3.a['title']
-                price_raw = book.select_one(".price_color").text.strip()
-                price = clean_price(price_raw)
-                
-                rating_word = book.p['class'][1]
-                rating = rating_map.get(rating_word, None)
-                
-                availability = book.select_one(".availability").text.strip()
-                
-                # Get the link to the book detail page
-                detail_link = urljoin(main_site + "catalogue/", book.h3.a['href'])
-                
-                # Visit the detail page
-                detail_res = requests.get(detail_link, timeout=10)
-                detail_soup = BeautifulSoup(detail_res.text, 'html.parser')
-                
-                # Extract category
-                breadcrumb = detail_soup.select("ul.breadcrumb li a")
-                category = breadcrumb[2].text if len(breadcrumb) > 2 else "Unknown"
-                
-                # Extract product description (if available)
-                desc = detail_soup.select_one("#product_description")
-                description = desc.find_next("p").text.strip() if desc else "No description available"
-                
-                books.append({
-                    "Title": title,
-                    "Price (£)": price,
-                    "Rating": rating,
-                    "Availability": availability,
-                    "Category": category,
-                    "Description": description
-                })
-                
+                category, description = future.result()
             except Exception as e:
                 print(f"⚠️ Error processing book on page {page}: {str(e)}")
                 continue
-        
-        # Add delay to be respectful to the server
-        time.sleep(1)
-        
-    except Exception as e:
-        print(f"❌ Error scraping page {page}: {str(e)}")
-        continue
+            
+            title, price, rating, availability, _ = row
+            titles.append(title)
+            prices.append(price)
+            ratings.append(rating)
+            avails.append(availability)
+            categories.append(category)
+            descriptions.append(description)
+
+asyncio.run(main())
 
 # Convert to DataFrame
-df = pd.DataFrame(books)
+df = pd.DataFrame({
+    "Title": titles,
+    "Price (£)": prices,
+    "Rating": ratings,
+    "Availability": avails,
+    "Category": categories,
+    "Description": descriptions
+})
 
 # Save to CSV
 df.to_csv("books_data.csv", index=False, encoding="utf-8-sig")